@@ -1,9 +1,13 @@
 import api from './index';
 
-export const recognizeFace = async (imageFile) => {
+export const recognizeFace = async (imageFile, { sessionId, fallbackGlobal = false } = {}) => {
     try {
       const formData = new FormData();
       formData.append('file', imageFile);
+      if (sessionId) {
+        formData.append('session_id', sessionId);
+        formData.append('fallback_global', fallbackGlobal);
+      }
   
       const response = await api.post('/recognize', formData, {
         headers: {
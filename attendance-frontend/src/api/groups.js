@@ -0,0 +1,10 @@
+import api from './index';
+
+export const getGroups = async () => {
+  try {
+    const response = await api.get('/groups/');
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to fetch groups');
+  }
+};
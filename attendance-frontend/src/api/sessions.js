@@ -2,12 +2,12 @@ import api from './index';
 
 const API_URL = 'http://localhost:8000/api';
 
-export const startSession = async () => {
+export const startSession = async (groupId = null) => {
   try {
     const token = localStorage.getItem('token');
     if (!token) throw new Error('No authentication token found');
 
-    const response = await api.post('/sessions/start', {}, {
+    const response = await api.post('/sessions/start', { group_id: groupId }, {
       headers: {
         'Authorization': `Bearer ${token}`,
         'Content-Type': 'application/json'
@@ -11,16 +11,19 @@ import {
   List,
   ListItem,
   ListItemText,
-  Avatar
+  Avatar,
+  FormControlLabel,
+  Switch
 } from '@mui/material';
 import { recognizeFace } from '../../api/faceRecognition';
 
-const FaceRecognition = ({ onRecognize, disabled }) => {
+const FaceRecognition = ({ onRecognize, disabled, sessionId }) => {
   const webcamRef = React.useRef(null);
   const [imgSrc, setImgSrc] = useState(null);
   const [loading, setLoading] = useState(false);
   const [matches, setMatches] = useState([]);
   const [error, setError] = useState(null);
+  const [fallbackGlobal, setFallbackGlobal] = useState(false);
 
   const capture = () => {
     const imageSrc = webcamRef.current.getScreenshot();
@@ -41,7 +44,7 @@ const FaceRecognition = ({ onRecognize, disabled }) => {
       const blob = await response.blob();
       
       // Call recognition API
-      const result = await recognizeFace(blob);
+      const result = await recognizeFace(blob, { sessionId, fallbackGlobal });
       
       if (result.length > 0) {
         setMatches(result);
@@ -101,6 +104,19 @@ const FaceRecognition = ({ onRecognize, disabled }) => {
           />
         )}
 
+        {sessionId && (
+          <FormControlLabel
+            control={
+              <Switch
+                checked={fallbackGlobal}
+                onChange={(e) => setFallbackGlobal(e.target.checked)}
+                disabled={loading}
+              />
+            }
+            label="Search all students if not on the class roster"
+          />
+        )}
+
         <Box display="flex" gap={2}>
           {!imgSrc ? (
             <Button 
@@ -6,6 +6,7 @@ import {
   getCurrentSession,
   markAttendance as apiMarkAttendance
 } from '../../api/sessions';
+import { getGroups } from '../../api/groups';
 import {
   Box,
   Button,
@@ -23,6 +24,10 @@ import {
   DialogActions,
   Chip,
   Avatar,
+  FormControl,
+  InputLabel,
+  Select,
+  MenuItem,
   useTheme
 } from '@mui/material';
 import {
@@ -47,6 +52,8 @@ const SessionForm = () => {
   const [confirmEnd, setConfirmEnd] = useState(false);
   const [existingSession, setExistingSession] = useState(null);
   const [sessionDuration, setSessionDuration] = useState(0);
+  const [groups, setGroups] = useState([]);
+  const [selectedGroup, setSelectedGroup] = useState('');
 
   const presentStudentsCount = useMemo(() => presentStudents.length, [presentStudents]);
 
@@ -71,6 +78,12 @@ const SessionForm = () => {
     checkActiveSession();
   }, []);
 
+  useEffect(() => {
+    getGroups()
+      .then(setGroups)
+      .catch((error) => setError(error.message));
+  }, []);
+
   useEffect(() => {
     let interval;
     if (session) {
@@ -106,7 +119,7 @@ const SessionForm = () => {
   };
 
   const handleStartSession = () => handleApiCall(
-    startSession,
+    () => startSession(selectedGroup || null),
     (result) => {
       if (result?.error === "ACTIVE_SESSION_EXISTS") {
         setExistingSession({
@@ -140,7 +153,7 @@ const SessionForm = () => {
   const handleNewSession = () => handleApiCall(
     async () => {
       await endSession(existingSession.id);
-      return startSession();
+      return startSession(selectedGroup || null);
     },
     (result) => {
       setSession({
@@ -203,7 +216,24 @@ const SessionForm = () => {
       )}
 
       {!session ? (
-        <Box display="flex" justifyContent="center">
+        <Box display="flex" justifyContent="center" alignItems="center" gap={2}>
+          <FormControl sx={{ minWidth: 220 }} size="small">
+            <InputLabel id="session-group-label">Class</InputLabel>
+            <Select
+              labelId="session-group-label"
+              value={selectedGroup}
+              label="Class"
+              onChange={(e) => setSelectedGroup(e.target.value)}
+              disabled={loading}
+            >
+              <MenuItem value="">All students</MenuItem>
+              {groups.map((group) => (
+                <MenuItem key={group.id} value={group.id}>
+                  {group.name} ({group.student_ids.length})
+                </MenuItem>
+              ))}
+            </Select>
+          </FormControl>
           <Button
             variant="contained"
             size="large"
@@ -250,6 +280,7 @@ const SessionForm = () => {
             <FaceRecognition 
               onRecognize={handleStudentRecognized}
               disabled={loading}
+              sessionId={session.id}
             />
           </Box>
           
@@ -0,0 +1,223 @@
+# app/embeddings.py
+import argparse
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+from deepface import DeepFace
+from deepface.commons import functions
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_NAME = "Facenet512"
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "deepface")
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "models/facenet512.onnx")
+ONNX_QUANTIZED_MODEL_PATH = os.getenv("ONNX_QUANTIZED_MODEL_PATH", "models/facenet512-uint8.onnx")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+
+class EmbeddingBackend(ABC):
+    """Computes Facenet512 embeddings. `represent` returns the same shape as
+    `DeepFace.represent` so call sites can switch engines freely."""
+
+    name = "base"
+
+    @abstractmethod
+    def represent(
+        self,
+        img_array: np.ndarray,
+        detector_backend: str = "opencv",
+        enforce_detection: bool = True,
+        align: bool = True
+    ) -> List[dict]:
+        ...
+
+
+class DeepFaceBackend(EmbeddingBackend):
+    name = "deepface"
+
+    def represent(self, img_array, detector_backend="opencv", enforce_detection=True, align=True):
+        return DeepFace.represent(
+            img_path=img_array,
+            model_name=MODEL_NAME,
+            detector_backend=detector_backend,
+            enforce_detection=enforce_detection,
+            align=align
+        )
+
+
+class OnnxBackend(EmbeddingBackend):
+    """Runs the exported Facenet512 graph on ONNX Runtime. Detection and
+    alignment still go through DeepFace so inputs match the Keras path."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str = ONNX_MODEL_PATH, threads: int = ONNX_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("onnxruntime is required for the onnx embedding backend") from e
+
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"ONNX model not found at {model_path}; run `python -m app.embeddings export` first"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.target_size = functions.find_target_size(model_name=MODEL_NAME)
+
+    def represent(self, img_array, detector_backend="opencv", enforce_detection=True, align=True):
+        img_objs = functions.extract_faces(
+            img=img_array,
+            target_size=self.target_size,
+            detector_backend=detector_backend,
+            grayscale=False,
+            enforce_detection=enforce_detection,
+            align=align
+        )
+        if not img_objs:
+            return []
+
+        batch = np.concatenate([img for img, _, _ in img_objs]).astype(np.float32)
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+
+        return [
+            {
+                "embedding": embedding.tolist(),
+                "facial_area": region,
+                "face_confidence": confidence
+            }
+            for embedding, (_, region, confidence) in zip(outputs, img_objs)
+        ]
+
+
+_backend: Optional[EmbeddingBackend] = None
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    global _backend
+    if _backend is None:
+        if EMBEDDING_BACKEND == "onnx":
+            _backend = OnnxBackend()
+        elif EMBEDDING_BACKEND == "deepface":
+            _backend = DeepFaceBackend()
+        else:
+            raise RuntimeError(f"Unknown embedding backend: {EMBEDDING_BACKEND}")
+    return _backend
+
+
+def export_onnx(output_path: str, quantized_path: Optional[str] = None):
+    """Export the DeepFace Facenet512 weights to ONNX, optionally with an
+    uint8 dynamic-quantized copy."""
+    import tensorflow as tf
+    import tf2onnx
+
+    model = DeepFace.build_model(MODEL_NAME)
+    height, width = functions.find_target_size(model_name=MODEL_NAME)
+    spec = (tf.TensorSpec((None, height, width, 3), tf.float32, name="input"),)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output_path)
+
+    if quantized_path:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        # ORT's CPU ConvInteger kernel only accepts uint8 weights
+        quantize_dynamic(output_path, quantized_path, weight_type=QuantType.QUInt8)
+
+
+def _load_images(paths: List[str]) -> List[np.ndarray]:
+    return [np.array(Image.open(path).convert("RGB")) for path in paths]
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def check_parity(model_path: str, images: List[np.ndarray], min_similarity: float) -> bool:
+    reference = DeepFaceBackend()
+    candidate = OnnxBackend(model_path)
+
+    similarities = []
+    for img_array in images:
+        expected = reference.represent(img_array, enforce_detection=False)[0]["embedding"]
+        actual = candidate.represent(img_array, enforce_detection=False)[0]["embedding"]
+        similarities.append(_cosine_similarity(expected, actual))
+
+    print(f"cosine similarity vs deepface over {len(similarities)} images: "
+          f"min={min(similarities):.5f} mean={np.mean(similarities):.5f}")
+    return min(similarities) >= min_similarity
+
+
+def benchmark(backend: EmbeddingBackend, images: List[np.ndarray], rounds: int, warmup: int = 3):
+    # POSIX only, so keep it out of the API's import path
+    import resource
+
+    for img_array in images[:warmup]:
+        backend.represent(img_array, enforce_detection=False)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for img_array in images:
+            begin = time.perf_counter()
+            backend.represent(img_array, enforce_detection=False)
+            latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    latencies_ms = np.asarray(latencies) * 1000
+    print(f"{backend.name}: p50={np.percentile(latencies_ms, 50):.1f}ms "
+          f"p95={np.percentile(latencies_ms, 95):.1f}ms "
+          f"throughput={len(latencies) / elapsed:.1f} img/s "
+          f"peak_rss={peak_rss_mb:.0f}MB")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Facenet512 embedding backend tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export Facenet512 to ONNX")
+    export_parser.add_argument("--output", default=ONNX_MODEL_PATH)
+    export_parser.add_argument("--quantized-output", help="Also write a uint8 dynamic-quantized model")
+
+    parity_parser = commands.add_parser("parity", help="Compare ONNX embeddings against DeepFace")
+    parity_parser.add_argument("--model", default=ONNX_MODEL_PATH)
+    parity_parser.add_argument("--min-similarity", type=float, default=0.999)
+    parity_parser.add_argument("images", nargs="+")
+
+    bench_parser = commands.add_parser("bench", help="Measure latency, throughput and peak RSS")
+    bench_parser.add_argument("--backend", choices=["deepface", "onnx"], default="deepface")
+    bench_parser.add_argument("--model", default=ONNX_MODEL_PATH)
+    bench_parser.add_argument("--rounds", type=int, default=10)
+    bench_parser.add_argument("images", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx(args.output, args.quantized_output)
+    elif args.command == "parity":
+        if not check_parity(args.model, _load_images(args.images), args.min_similarity):
+            raise SystemExit(1)
+    elif args.command == "bench":
+        # Run one backend per process so peak RSS reflects a single worker
+        backend = OnnxBackend(args.model) if args.backend == "onnx" else DeepFaceBackend()
+        benchmark(backend, _load_images(args.images), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# app/kiosk.py
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from .embeddings import MODEL_NAME, get_embedding_backend
+
+SNAPSHOT_VERSION = 1
+EMBEDDING_DIMENSION = 512
+
+
+def pack_embeddings(embeddings: List[List[float]]) -> str:
+    """Pack a list of embeddings into a base64 string of row-major float32."""
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIMENSION)
+    return base64.b64encode(matrix.tobytes()).decode("utf-8")
+
+
+def unpack_embeddings(packed: str, dimension: int = EMBEDDING_DIMENSION) -> np.ndarray:
+    raw = base64.b64decode(packed)
+    return np.frombuffer(raw, dtype=np.float32).reshape(-1, dimension)
+
+
+def gallery_digest(student_ids: List[str], packed: str) -> str:
+    """Content hash that lets a kiosk tell whether its snapshot is stale."""
+    digest = hashlib.sha256()
+    for student_id in student_ids:
+        digest.update(student_id.encode("utf-8"))
+    digest.update(packed.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class GalleryIndex:
+    """In-memory cosine search over a fixed set of student embeddings."""
+
+    def __init__(self, students: List[dict], embeddings: np.ndarray, threshold: float):
+        gallery = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIMENSION)
+        if len(gallery) != len(students):
+            raise ValueError("Gallery embeddings do not match its student list")
+        norms = np.linalg.norm(gallery, axis=1, keepdims=True)
+        self.gallery = gallery / np.where(norms == 0, 1, norms)
+        self.students = students
+        self.threshold = threshold
+
+    def __len__(self):
+        return len(self.students)
+
+    def match(self, embedding: List[float]) -> List[dict]:
+        if len(self.students) == 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        distances = 1 - self.gallery @ (query / norm)
+
+        matches = []
+        for index in np.argsort(distances):
+            distance = float(distances[index])
+            if distance >= self.threshold:
+                break
+            student = self.students[index]
+            matches.append({
+                "student_id": student["student_id"],
+                "name": student["name"],
+                "cne": student["cne"],
+                "confidence": 1 - distance
+            })
+        return matches
+
+
+class KioskRecognizer:
+    """Matches faces against an exported gallery snapshot without the API."""
+
+    def __init__(self, snapshot: dict):
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {snapshot.get('version')}")
+        if snapshot.get("model_name") != MODEL_NAME:
+            raise ValueError(f"Unsupported model: {snapshot.get('model_name')}")
+
+        self.session_id = snapshot["session_id"]
+        self.gallery_version = snapshot["gallery_version"]
+        self.index = GalleryIndex(
+            snapshot["students"],
+            unpack_embeddings(snapshot["embeddings"], snapshot["dimension"]),
+            snapshot["threshold"]
+        )
+
+    def match(self, embedding: List[float]) -> List[dict]:
+        return self.index.match(embedding)
+
+    def recognize(self, img_array: np.ndarray) -> List[dict]:
+        embedding = get_embedding_backend().represent(
+            img_array,
+            enforce_detection=False
+        )[0]['embedding']
+        return self.match(embedding)
+
+    def attendance_event(self, student_id: str, confidence: Optional[float] = None) -> dict:
+        """Build an event for the bulk-ingest endpoint. The event id is stable
+        per session and student so re-uploads stay idempotent."""
+        return {
+            "event_id": f"{self.session_id}:{student_id}",
+            "student_id": student_id,
+            "seen_at": datetime.now().isoformat(),
+            "confidence": confidence
+        }
+
+
+def build_batch(kiosk_id: str, events: List[dict]) -> dict:
+    """Wrap events for upload. The batch_id is unique per kiosk run; re-send the
+    same payload to retry, since the server ignores a batch_id it has seen."""
+    return {
+        "batch_id": f"{kiosk_id}:{uuid.uuid4().hex}",
+        "kiosk_id": kiosk_id,
+        "events": events
+    }
+
+
+def load_snapshot(path: str) -> KioskRecognizer:
+    with open(path, "r", encoding="utf-8") as snapshot_file:
+        return KioskRecognizer(json.load(snapshot_file))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Recognize faces against an offline gallery snapshot")
+    parser.add_argument("snapshot", help="Path to a snapshot exported from /sessions/{id}/gallery")
+    parser.add_argument("images", nargs="+", help="Images to recognize")
+    parser.add_argument("--kiosk-id", default=socket.gethostname(), help="Identifies this kiosk in uploads")
+    args = parser.parse_args(argv)
+
+    recognizer = load_snapshot(args.snapshot)
+    events = {}
+    for image_path in args.images:
+        img_array = np.array(Image.open(image_path).convert("RGB"))
+        matches = recognizer.recognize(img_array)
+        if matches:
+            best = matches[0]
+            event = recognizer.attendance_event(best["student_id"], best["confidence"])
+            events.setdefault(event["event_id"], event)
+
+    print(json.dumps(build_batch(args.kiosk_id, list(events.values())), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,11 @@ from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 import base64
 import numpy as np
 from io import BytesIO
 from PIL import Image
-from deepface import DeepFace
 from bson import ObjectId
 from pydantic import BaseModel
 from passlib.context import CryptContext
@@ -27,8 +26,16 @@ from .models import (
     StudentResponse,
     SessionResponse,
     AttendanceStats,
-    FaceMatch
+    FaceMatch,
+    GallerySnapshot,
+    AttendanceBatch,
+    BatchIngestResult,
+    GroupCreate,
+    GroupUpdate,
+    GroupResponse
 )
+from .embeddings import get_embedding_backend
+from .kiosk import SNAPSHOT_VERSION, MODEL_NAME, EMBEDDING_DIMENSION, GalleryIndex, pack_embeddings, gallery_digest
 
 app = FastAPI()
 
@@ -41,12 +48,19 @@ SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Cosine distance below which a face counts as a match
+RECOGNITION_THRESHOLD = 0.55
+
 # Database setup
 client = MongoClient("mongodb://localhost:27017/")
 db = client["attendance_system"]
 students_collection = db["students"]
 admins_collection = db["admins"]
 sessions_collection = db["sessions"]
+groups_collection = db["groups"]
+
+# Per-session roster sub-indexes, keyed by session id
+roster_indexes: Dict[str, GalleryIndex] = {}
 
 # CORS configuration
 origins = [
@@ -129,9 +143,8 @@ async def add_student(
         image = Image.open(BytesIO(image_bytes)).convert("RGB")
         img_array = np.array(image)
         
-        embedding_obj = DeepFace.represent(
-            img_path=img_array,
-            model_name='Facenet512',
+        embedding_obj = get_embedding_backend().represent(
+            img_array,
             detector_backend='opencv',
             enforce_detection=True,
             align=True
@@ -206,6 +219,159 @@ async def get_student(
         logging.error(f"Error fetching student: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _validate_student_ids(student_ids: List[str]) -> List[str]:
+    invalid = [student_id for student_id in student_ids if not ObjectId.is_valid(student_id)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid student ID format: {', '.join(invalid)}")
+
+    unique_ids = sorted(set(student_ids))
+    found = {
+        str(student["_id"])
+        for student in students_collection.find(
+            {"_id": {"$in": [ObjectId(student_id) for student_id in unique_ids]}},
+            {"_id": 1}
+        )
+    }
+    missing = [student_id for student_id in unique_ids if student_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Students not found: {', '.join(missing)}")
+    return unique_ids
+
+def _get_admin_group(group_id: str, current_admin: Admin):
+    if not ObjectId.is_valid(group_id):
+        raise HTTPException(status_code=400, detail="Invalid group ID format")
+    group = groups_collection.find_one({
+        "_id": ObjectId(group_id),
+        "admin_id": str(current_admin["_id"])
+    })
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found or not authorized")
+    return group
+
+def _format_group(group):
+    return {
+        "id": str(group["_id"]),
+        "name": group["name"],
+        "admin_id": group["admin_id"],
+        "student_ids": group.get("student_ids", []),
+        "created_at": group["created_at"]
+    }
+
+# Group endpoints
+@app.post("/groups/", response_model=GroupResponse)
+async def create_group(
+    group: GroupCreate,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        group_doc = {
+            "name": group.name,
+            "admin_id": str(current_admin["_id"]),
+            "student_ids": _validate_student_ids(group.student_ids),
+            "created_at": datetime.now()
+        }
+        result = groups_collection.insert_one(group_doc)
+        return _format_group(groups_collection.find_one({"_id": result.inserted_id}))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating group: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create group")
+
+@app.get("/groups/", response_model=List[GroupResponse])
+async def get_groups(current_admin: Admin = Depends(get_current_active_admin)):
+    try:
+        return [
+            _format_group(group)
+            for group in groups_collection.find({"admin_id": str(current_admin["_id"])})
+        ]
+    except Exception as e:
+        logger.error(f"Error fetching groups: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch groups")
+
+@app.get("/groups/{group_id}", response_model=GroupResponse)
+async def get_group(
+    group_id: str,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    return _format_group(_get_admin_group(group_id, current_admin))
+
+@app.put("/groups/{group_id}", response_model=GroupResponse)
+async def update_group(
+    group_id: str,
+    group_update: GroupUpdate,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        group = _get_admin_group(group_id, current_admin)
+        update_data = {}
+        if group_update.name is not None:
+            update_data["name"] = group_update.name
+        if group_update.student_ids is not None:
+            update_data["student_ids"] = _validate_student_ids(group_update.student_ids)
+        if update_data:
+            groups_collection.update_one({"_id": group["_id"]}, {"$set": update_data})
+        return _format_group(groups_collection.find_one({"_id": group["_id"]}))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating group: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update group")
+
+@app.delete("/groups/{group_id}")
+async def delete_group(
+    group_id: str,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        group = _get_admin_group(group_id, current_admin)
+        # Sessions keep their own roster copy, so past stats are unaffected
+        groups_collection.delete_one({"_id": group["_id"]})
+        return {"message": "Group deleted successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting group: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to delete group")
+
+@app.post("/groups/{group_id}/students", response_model=GroupResponse)
+async def add_group_students(
+    group_id: str,
+    student_ids: List[str] = Body(..., embed=True),
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        group = _get_admin_group(group_id, current_admin)
+        groups_collection.update_one(
+            {"_id": group["_id"]},
+            {"$addToSet": {"student_ids": {"$each": _validate_student_ids(student_ids)}}}
+        )
+        return _format_group(groups_collection.find_one({"_id": group["_id"]}))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error adding group students: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update group")
+
+@app.delete("/groups/{group_id}/students/{student_id}", response_model=GroupResponse)
+async def remove_group_student(
+    group_id: str,
+    student_id: str,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        group = _get_admin_group(group_id, current_admin)
+        groups_collection.update_one(
+            {"_id": group["_id"]},
+            {"$pull": {"student_ids": student_id}}
+        )
+        return _format_group(groups_collection.find_one({"_id": group["_id"]}))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error removing group student: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update group")
+
 # Authentication endpoints
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -246,6 +412,19 @@ async def register_admin(admin: AdminCreate):
 
 # Add these endpoints to your FastAPI app
 
+def _roster_size(session, total_students: int) -> int:
+    # Sessions started before rosters existed cover every student
+    if session.get("group_id"):
+        return len(session.get("roster", []))
+    return total_students
+
+def _present_count(session) -> int:
+    # Off-roster students (global fallback, manual marking) don't count toward a group's rate
+    present = session.get("present_students", [])
+    if session.get("group_id"):
+        return len(set(present) & set(session.get("roster", [])))
+    return len(present)
+
 @app.get("/attendance/stats", response_model=AttendanceStats)
 async def get_attendance_stats(current_admin: Admin = Depends(get_current_active_admin)):
     try:
@@ -261,8 +440,8 @@ async def get_attendance_stats(current_admin: Admin = Depends(get_current_active
             "admin_id": str(current_admin["_id"])
         }))
         
-        today_present = sum(len(session.get("present_students", [])) for session in today_sessions)
-        today_total = total_students * len(today_sessions) if today_sessions else 0
+        today_present = sum(_present_count(session) for session in today_sessions)
+        today_total = sum(_roster_size(session, total_students) for session in today_sessions)
         
         recent_sessions = list(sessions_collection.find(
             {"admin_id": str(current_admin["_id"]), "status": "completed"}
@@ -278,8 +457,8 @@ async def get_attendance_stats(current_admin: Admin = Depends(get_current_active
                 {
                     "id": str(session["_id"]),
                     "date": session["start_time"],
-                    "presentCount": len(session.get("present_students", [])),
-                    "absentCount": total_students - len(session.get("present_students", []))
+                    "presentCount": _present_count(session),
+                    "absentCount": _roster_size(session, total_students) - _present_count(session)
                 }
                 for session in recent_sessions
             ]
@@ -320,6 +499,7 @@ async def get_current_session(current_admin: Admin = Depends(get_current_active_
             "start_time": session["start_time"],
             "status": session["status"],
             "admin_id": session["admin_id"],
+            "group_id": session.get("group_id"),
             "present_students": present_students
         }
     except Exception as e:
@@ -330,7 +510,10 @@ async def get_current_session(current_admin: Admin = Depends(get_current_active_
         )
 
 @app.post("/sessions/start", response_model=SessionResponse)
-async def start_attendance_session(current_admin: Admin = Depends(get_current_active_admin)):
+async def start_attendance_session(
+    group_id: Optional[str] = Body(None, embed=True),
+    current_admin: Admin = Depends(get_current_active_admin)
+):
     try:
         existing_session = sessions_collection.find_one({
             "admin_id": str(current_admin["_id"]),
@@ -349,17 +532,25 @@ async def start_attendance_session(current_admin: Admin = Depends(get_current_ac
             "status": "active",
             "present_students": []
         }
+        if group_id:
+            group = _get_admin_group(group_id, current_admin)
+            session_data["group_id"] = group_id
+            session_data["roster"] = group.get("student_ids", [])
         
         result = sessions_collection.insert_one(session_data)
         session = sessions_collection.find_one({"_id": result.inserted_id})
+        get_roster_index(session)
         
         return {
             "id": str(session["_id"]),
             "start_time": session["start_time"],
             "status": session["status"],
             "admin_id": session["admin_id"],
+            "group_id": session.get("group_id"),
             "present_students": []
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error starting session: {str(e)}")
         raise HTTPException(
@@ -368,46 +559,105 @@ async def start_attendance_session(current_admin: Admin = Depends(get_current_ac
         )
 
 
+def _load_gallery(student_filter: dict):
+    students = []
+    embeddings = []
+    cursor = students_collection.find(
+        student_filter,
+        {"name": 1, "cne": 1, "embedding": 1}
+    ).sort("_id", 1)
+    for student in cursor:
+        if len(student.get("embedding", [])) != EMBEDDING_DIMENSION:
+            continue
+        students.append({
+            "student_id": str(student["_id"]),
+            "name": student["name"],
+            "cne": student["cne"]
+        })
+        embeddings.append(student["embedding"])
+    return students, embeddings
+
+def _roster_filter(session) -> dict:
+    if session.get("group_id"):
+        return {"_id": {"$in": [ObjectId(student_id) for student_id in session.get("roster", [])]}}
+    return {}
+
+def get_roster_index(session) -> Optional[GalleryIndex]:
+    """Return the session's roster sub-index, building it on first use.
+    Sessions without a group have no roster and search the global gallery.
+    Only active sessions are cached; a worker that sees an ended session
+    evicts its entry, since end_session only clears its own process."""
+    if not session.get("group_id"):
+        return None
+    session_id = str(session["_id"])
+    active = session.get("status") == "active"
+    if not active:
+        roster_indexes.pop(session_id, None)
+    index = roster_indexes.get(session_id)
+    if index is None:
+        students, embeddings = _load_gallery(_roster_filter(session))
+        index = GalleryIndex(students, np.asarray(embeddings, dtype=np.float32), RECOGNITION_THRESHOLD)
+        if active:
+            roster_indexes[session_id] = index
+    return index
+
+def _search_global_gallery(embedding: List[float]) -> List[dict]:
+    students, embeddings = _load_gallery({})
+    index = GalleryIndex(students, np.asarray(embeddings, dtype=np.float32), RECOGNITION_THRESHOLD)
+    return _attach_images(index.match(embedding))
+
+def _attach_images(matches: List[dict]) -> List[dict]:
+    if not matches:
+        return matches
+    images = {
+        str(student["_id"]): student.get("image") or ""
+        for student in students_collection.find(
+            {"_id": {"$in": [ObjectId(match["student_id"]) for match in matches]}},
+            {"image": 1}
+        )
+    }
+    for match in matches:
+        match["image"] = images.get(match["student_id"], "")
+    return matches
+
 @app.post("/recognize", response_model=List[FaceMatch])
 async def recognize_face(
     file: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
+    fallback_global: bool = Form(False),
     current_admin: Admin = Depends(get_current_active_admin)
 ):
     try:
+        roster_index = None
+        if session_id:
+            if not ObjectId.is_valid(session_id):
+                raise HTTPException(status_code=400, detail="Invalid session ID format")
+            session = sessions_collection.find_one({
+                "_id": ObjectId(session_id),
+                "admin_id": str(current_admin["_id"])
+            })
+            if not session:
+                raise HTTPException(status_code=404, detail="Session not found or not authorized")
+            roster_index = get_roster_index(session)
+
         image_bytes = await file.read()
         image = Image.open(BytesIO(image_bytes)).convert("RGB")
         img_array = np.array(image)
         
-        embedding = DeepFace.represent(
-            img_array, 
-            model_name='Facenet512', 
+        embedding = get_embedding_backend().represent(
+            img_array,
             enforce_detection=False
         )[0]['embedding']
         
-        matches = []
-        for student in students_collection.find():
-            try:
-                result = DeepFace.verify(
-                    embedding,
-                    student['embedding'],
-                    model_name='Facenet512',
-                    distance_metric='cosine',
-                    enforce_detection=False
-                )
-                
-                if result['distance'] < 0.55:
-                    matches.append({
-                        "student_id": str(student["_id"]),
-                        "name": student["name"],
-                        "cne": student["cne"],
-                        "confidence": 1 - result['distance'],
-                        "image": student["image"]
-                    })
-            except Exception as e:
-                continue
-        
-        return sorted(matches, key=lambda x: x["confidence"], reverse=True)
+        if roster_index is not None:
+            matches = roster_index.match(embedding)
+            if matches or not fallback_global:
+                return _attach_images(matches)
+
+        return _search_global_gallery(embedding)
             
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Face recognition failed: {str(e)}")
         raise HTTPException(
@@ -457,6 +707,131 @@ async def mark_attendance(
         logger.error(f"Error marking attendance: {str(e)}")
         raise HTTPException(500, "Internal server error")
 
+@app.get("/sessions/{session_id}/gallery", response_model=GallerySnapshot)
+async def export_gallery(
+    session_id: str,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        if not ObjectId.is_valid(session_id):
+            raise HTTPException(status_code=400, detail="Invalid session ID format")
+
+        session = sessions_collection.find_one({
+            "_id": ObjectId(session_id),
+            "admin_id": str(current_admin["_id"])
+        })
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found or not authorized")
+
+        students, embeddings = _load_gallery(_roster_filter(session))
+        packed = pack_embeddings(embeddings)
+        return {
+            "version": SNAPSHOT_VERSION,
+            "gallery_version": gallery_digest([student["student_id"] for student in students], packed),
+            "session_id": session_id,
+            "model_name": MODEL_NAME,
+            "dimension": EMBEDDING_DIMENSION,
+            "threshold": RECOGNITION_THRESHOLD,
+            "created_at": datetime.now(),
+            "students": students,
+            "embeddings": packed
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting gallery: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export gallery")
+
+@app.post("/sessions/{session_id}/attendance/batch", response_model=BatchIngestResult)
+async def ingest_attendance_batch(
+    session_id: str,
+    batch: AttendanceBatch,
+    current_admin: Admin = Depends(get_current_active_admin)
+):
+    try:
+        if not ObjectId.is_valid(session_id):
+            raise HTTPException(status_code=400, detail="Invalid session ID format")
+        session_oid = ObjectId(session_id)
+
+        session = sessions_collection.find_one(
+            {"_id": session_oid, "admin_id": str(current_admin["_id"])},
+            {"synced_batches": 1, "group_id": 1, "roster": 1}
+        )
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found or not authorized")
+        if batch.batch_id in session.get("synced_batches", []):
+            return {"batch_id": batch.batch_id, "duplicate": True, "accepted": 0, "rejected": []}
+
+        candidate_ids = {
+            event.student_id for event in batch.events if ObjectId.is_valid(event.student_id)
+        }
+        known_ids = {
+            str(student["_id"])
+            for student in students_collection.find(
+                {"_id": {"$in": [ObjectId(student_id) for student_id in candidate_ids]}},
+                {"_id": 1}
+            )
+        }
+        if session.get("group_id"):
+            known_ids &= set(session.get("roster", []))
+        accepted = [event for event in batch.events if event.student_id in known_ids]
+        rejected = [event.event_id for event in batch.events if event.student_id not in known_ids]
+
+        # Keep the first sighting and best confidence per student, across batches too
+        first_seen = {}
+        best_confidence = {}
+        for event in accepted:
+            if event.student_id not in first_seen or event.seen_at < first_seen[event.student_id]:
+                first_seen[event.student_id] = event.seen_at
+            if event.confidence is not None:
+                best_confidence[event.student_id] = max(
+                    event.confidence, best_confidence.get(event.student_id, event.confidence)
+                )
+
+        update = {
+            "$addToSet": {
+                "present_students": {"$each": sorted(first_seen)},
+                "synced_batches": batch.batch_id
+            },
+            "$push": {
+                "kiosk_syncs": {
+                    "batch_id": batch.batch_id,
+                    "kiosk_id": batch.kiosk_id,
+                    "accepted": len(accepted),
+                    "synced_at": datetime.now()
+                }
+            }
+        }
+        if first_seen:
+            update["$min"] = {
+                f"sightings.{student_id}.seen_at": seen_at for student_id, seen_at in first_seen.items()
+            }
+        if best_confidence:
+            update["$max"] = {
+                f"sightings.{student_id}.confidence": confidence
+                for student_id, confidence in best_confidence.items()
+            }
+
+        # Single write per session; the batch_id guard makes retries a no-op
+        result = sessions_collection.update_one(
+            {"_id": session_oid, "synced_batches": {"$ne": batch.batch_id}},
+            update
+        )
+        if result.matched_count == 0:
+            return {"batch_id": batch.batch_id, "duplicate": True, "accepted": 0, "rejected": []}
+
+        return {
+            "batch_id": batch.batch_id,
+            "duplicate": False,
+            "accepted": len(accepted),
+            "rejected": rejected
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ingesting attendance batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to ingest attendance batch")
+
 @app.post("/sessions/{session_id}/end", response_model=SessionResponse)
 async def end_session(
     session_id: str,
@@ -488,6 +863,7 @@ async def end_session(
 
         if update_result.modified_count == 0:
             raise HTTPException(status_code=400, detail="Failed to update session")
+        roster_indexes.pop(session_id, None)
 
         # Fetch updated session with proper present_students format
         updated_session = sessions_collection.find_one({"_id": ObjectId(session_id)})
@@ -511,6 +887,7 @@ async def end_session(
             "end_time": updated_session.get("end_time"),
             "status": updated_session["status"],
             "admin_id": updated_session["admin_id"],
+            "group_id": updated_session.get("group_id"),
             "present_students": present_students  # Now properly formatted
         }
         
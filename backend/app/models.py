@@ -1,5 +1,5 @@
 #model.py
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 from typing import List, Optional
 
@@ -55,8 +55,24 @@ class SessionResponse(BaseModel):
     end_time: Optional[datetime] = None
     status: str
     admin_id: str
+    group_id: Optional[str] = None
     present_students: List[StudentResponse]
 
+class GroupCreate(BaseModel):
+    name: str
+    student_ids: List[str] = []
+
+class GroupUpdate(BaseModel):
+    name: Optional[str] = None
+    student_ids: Optional[List[str]] = None
+
+class GroupResponse(BaseModel):
+    id: str
+    name: str
+    admin_id: str
+    student_ids: List[str]
+    created_at: datetime
+
 class AttendanceStats(BaseModel):
     totalStudents: int
     todayPresent: int
@@ -72,3 +88,44 @@ class FaceMatch(BaseModel):
     confidence: float
     image: str
 
+
+class GalleryEntry(BaseModel):
+    student_id: str
+    name: str
+    cne: str
+
+class GallerySnapshot(BaseModel):
+    version: int
+    gallery_version: str
+    session_id: str
+    model_name: str
+    dimension: int
+    threshold: float
+    created_at: datetime
+    students: List[GalleryEntry]
+    embeddings: str
+
+class AttendanceEvent(BaseModel):
+    event_id: str
+    student_id: str
+    seen_at: datetime
+    confidence: Optional[float] = None
+
+    @field_validator("seen_at")
+    @classmethod
+    def to_naive_local(cls, value: datetime) -> datetime:
+        # Sessions store naive local times, so offsets are folded in to keep them comparable
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+class AttendanceBatch(BaseModel):
+    batch_id: str
+    kiosk_id: Optional[str] = None
+    events: List[AttendanceEvent]
+
+class BatchIngestResult(BaseModel):
+    batch_id: str
+    duplicate: bool
+    accepted: int
+    rejected: List[str]
@@ -0,0 +1,58 @@
+from bson import ObjectId
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for the endpoints under test."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.updates = []
+
+    def _matches(self, document, query):
+        for key, condition in query.items():
+            value = document.get(key)
+            if isinstance(condition, dict) and "$ne" in condition:
+                if condition["$ne"] in (value or []):
+                    return False
+            elif isinstance(condition, dict) and "$in" in condition:
+                if value not in condition["$in"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def find_one(self, query, projection=None):
+        return next((doc for doc in self.documents if self._matches(doc, query)), None)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(doc for doc in self.documents if self._matches(doc, query or {}))
+
+    def insert_one(self, document):
+        document = dict(document, _id=ObjectId())
+        self.documents.append(document)
+        return type("Result", (), {"inserted_id": document["_id"]})()
+
+    def delete_one(self, query):
+        document = self.find_one(query)
+        if document is not None:
+            self.documents.remove(document)
+        return type("Result", (), {"deleted_count": int(document is not None)})()
+
+    def update_one(self, query, update):
+        self.updates.append(update)
+        document = self.find_one(query)
+        if document is None:
+            return type("Result", (), {"matched_count": 0})()
+        document.update(update.get("$set", {}))
+        for key, value in update.get("$addToSet", {}).items():
+            values = value["$each"] if isinstance(value, dict) else [value]
+            target = document.setdefault(key, [])
+            target.extend(item for item in values if item not in target)
+        for key, value in update.get("$pull", {}).items():
+            document[key] = [item for item in document.get(key, []) if item != value]
+        return type("Result", (), {"matched_count": 1})()
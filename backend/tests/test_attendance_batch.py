@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from app import main
+from app.models import AttendanceBatch
+
+from .fakes import FakeCollection
+
+
+def _setup(monkeypatch):
+    admin = {"_id": ObjectId()}
+    student = {"_id": ObjectId()}
+    session = {"_id": ObjectId(), "admin_id": str(admin["_id"]), "present_students": []}
+    sessions = FakeCollection([session])
+    monkeypatch.setattr(main, "sessions_collection", sessions)
+    monkeypatch.setattr(main, "students_collection", FakeCollection([student]))
+    return admin, str(student["_id"]), session, sessions
+
+
+def _ingest(session, admin, batch):
+    return asyncio.run(main.ingest_attendance_batch(str(session["_id"]), batch, current_admin=admin))
+
+
+def test_repeated_batch_is_duplicate(monkeypatch):
+    admin, student_id, session, sessions = _setup(monkeypatch)
+    batch = AttendanceBatch(batch_id="b1", events=[
+        {"event_id": "e1", "student_id": student_id, "seen_at": datetime(2024, 1, 1, 9, 0)}
+    ])
+
+    first = _ingest(session, admin, batch)
+    second = _ingest(session, admin, batch)
+
+    assert first["duplicate"] is False
+    assert first["accepted"] == 1
+    assert second["duplicate"] is True
+    assert session["present_students"] == [student_id]
+    assert len(sessions.updates) == 1
+
+
+def test_batch_keeps_first_sighting_and_rejects_unknown(monkeypatch):
+    admin, student_id, session, sessions = _setup(monkeypatch)
+    batch = AttendanceBatch(batch_id="b1", events=[
+        {"event_id": "e1", "student_id": student_id, "seen_at": datetime(2024, 1, 1, 9, 5), "confidence": 0.7},
+        {"event_id": "e2", "student_id": student_id, "seen_at": datetime(2024, 1, 1, 9, 0), "confidence": 0.6},
+        {"event_id": "e3", "student_id": str(ObjectId()), "seen_at": datetime(2024, 1, 1, 9, 0)}
+    ])
+
+    result = _ingest(session, admin, batch)
+
+    assert result["rejected"] == ["e3"]
+    update = sessions.updates[0]
+    assert update["$min"] == {f"sightings.{student_id}.seen_at": datetime(2024, 1, 1, 9, 0)}
+    assert update["$max"] == {f"sightings.{student_id}.confidence": 0.7}
+
+
+def test_batch_accepts_mixed_naive_and_aware_timestamps(monkeypatch):
+    admin, student_id, session, sessions = _setup(monkeypatch)
+    aware = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    batch = AttendanceBatch(batch_id="b1", events=[
+        {"event_id": "e1", "student_id": student_id, "seen_at": "2024-01-01T09:00:00"},
+        {"event_id": "e2", "student_id": student_id, "seen_at": aware.isoformat()}
+    ])
+
+    result = _ingest(session, admin, batch)
+
+    assert result["accepted"] == 2
+    expected = min(datetime(2024, 1, 1, 9, 0), aware.astimezone().replace(tzinfo=None))
+    assert sessions.updates[0]["$min"] == {f"sightings.{student_id}.seen_at": expected}
+    assert expected.tzinfo is None
+
+
+def test_batches_from_two_kiosks_are_both_applied(monkeypatch):
+    admin, student_id, session, sessions = _setup(monkeypatch)
+    events = [{"event_id": "e1", "student_id": student_id, "seen_at": datetime(2024, 1, 1, 9, 0)}]
+
+    first = _ingest(session, admin, AttendanceBatch(batch_id="a:1", kiosk_id="a", events=events))
+    second = _ingest(session, admin, AttendanceBatch(batch_id="b:1", kiosk_id="b", events=events))
+
+    assert first["duplicate"] is False
+    assert second["duplicate"] is False
+    assert [update["$push"]["kiosk_syncs"]["kiosk_id"] for update in sessions.updates] == ["a", "b"]
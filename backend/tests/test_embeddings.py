@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pytest
+
+from app import embeddings
+
+pytest.importorskip("onnxruntime")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fixture_image():
+    # Detection is disabled in the parity check, so any fixed RGB frame exercises
+    # the same resize/normalise path in both engines
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, 224, dtype=np.float32)
+    image = (gradient[None, :, None] + rng.normal(0, 20, size=(224, 224, 3))).clip(0, 255)
+    return image.astype(np.uint8)
+
+
+def _model_path(path):
+    # Relative paths are relative to backend/, wherever pytest is started from
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+@pytest.mark.parametrize("model_path, min_similarity", [
+    (embeddings.ONNX_MODEL_PATH, 0.999),
+    (embeddings.ONNX_QUANTIZED_MODEL_PATH, 0.99),
+], ids=["fp32", "uint8"])
+def test_onnx_parity_with_deepface(model_path, min_similarity):
+    model_path = _model_path(model_path)
+    if not os.path.exists(model_path):
+        pytest.skip(f"{model_path} not found; run `python -m app.embeddings export --quantized-output {embeddings.ONNX_QUANTIZED_MODEL_PATH}`")
+    assert embeddings.check_parity(model_path, [_fixture_image()], min_similarity=min_similarity)
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        embeddings.EmbeddingBackend()
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app import main
+from app.models import GroupCreate, GroupUpdate
+
+from .fakes import FakeCollection
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    admin = {"_id": ObjectId()}
+    students = [{"_id": ObjectId()} for _ in range(3)]
+    monkeypatch.setattr(main, "students_collection", FakeCollection(students))
+    monkeypatch.setattr(main, "groups_collection", FakeCollection([]))
+    return admin, [str(student["_id"]) for student in students]
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def _create(admin, name, student_ids):
+    return _run(main.create_group(GroupCreate(name=name, student_ids=student_ids), current_admin=admin))
+
+
+def test_create_group_deduplicates_members(setup):
+    admin, student_ids = setup
+
+    group = _create(admin, "Algebra", [student_ids[1], student_ids[0], student_ids[1]])
+
+    assert group["name"] == "Algebra"
+    assert group["admin_id"] == str(admin["_id"])
+    assert group["student_ids"] == sorted(student_ids[:2])
+
+
+def test_create_group_rejects_invalid_and_unknown_students(setup):
+    admin, student_ids = setup
+
+    with pytest.raises(HTTPException) as invalid:
+        _create(admin, "Algebra", ["not-an-id"])
+    with pytest.raises(HTTPException) as unknown:
+        _create(admin, "Algebra", [student_ids[0], str(ObjectId())])
+
+    assert invalid.value.status_code == 400
+    assert unknown.value.status_code == 404
+    assert main.groups_collection.documents == []
+
+
+def test_add_and_remove_group_students(setup):
+    admin, student_ids = setup
+    group = _create(admin, "Algebra", [student_ids[0]])
+
+    group = _run(main.add_group_students(group["id"], [student_ids[0], student_ids[2]], current_admin=admin))
+    assert group["student_ids"] == [student_ids[0], student_ids[2]]
+
+    group = _run(main.remove_group_student(group["id"], student_ids[0], current_admin=admin))
+    assert group["student_ids"] == [student_ids[2]]
+
+
+def test_update_group_renames_and_replaces_members(setup):
+    admin, student_ids = setup
+    group = _create(admin, "Algebra", [student_ids[0]])
+
+    renamed = _run(main.update_group(group["id"], GroupUpdate(name="Geometry"), current_admin=admin))
+    assert renamed["name"] == "Geometry"
+    assert renamed["student_ids"] == [student_ids[0]]
+
+    replaced = _run(main.update_group(group["id"], GroupUpdate(student_ids=[student_ids[2]]), current_admin=admin))
+    assert replaced["student_ids"] == [student_ids[2]]
+
+    with pytest.raises(HTTPException) as unknown:
+        _run(main.update_group(group["id"], GroupUpdate(student_ids=[str(ObjectId())]), current_admin=admin))
+    assert unknown.value.status_code == 404
+
+
+def test_groups_are_scoped_to_their_admin(setup):
+    admin, student_ids = setup
+    other_admin = {"_id": ObjectId()}
+    group = _create(admin, "Algebra", [student_ids[0]])
+
+    for call in (
+        main.get_group(group["id"], current_admin=other_admin),
+        main.add_group_students(group["id"], [student_ids[1]], current_admin=other_admin),
+        main.delete_group(group["id"], current_admin=other_admin),
+    ):
+        with pytest.raises(HTTPException) as error:
+            _run(call)
+        assert error.value.status_code == 404
+
+    assert _run(main.get_groups(current_admin=other_admin)) == []
+    assert [g["id"] for g in _run(main.get_groups(current_admin=admin))] == [group["id"]]
+
+
+def test_delete_group(setup):
+    admin, student_ids = setup
+    group = _create(admin, "Algebra", [])
+
+    _run(main.delete_group(group["id"], current_admin=admin))
+
+    with pytest.raises(HTTPException) as error:
+        _run(main.get_group(group["id"], current_admin=admin))
+    assert error.value.status_code == 404
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.kiosk import (
+    EMBEDDING_DIMENSION,
+    GalleryIndex,
+    SNAPSHOT_VERSION,
+    KioskRecognizer,
+    build_batch,
+    gallery_digest,
+    pack_embeddings,
+    unpack_embeddings
+)
+
+
+def _embedding(seed):
+    return np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSION).astype(np.float32)
+
+
+def _snapshot(embeddings, threshold=0.55):
+    students = [
+        {"student_id": f"s{i}", "name": f"Student {i}", "cne": f"C{i}"}
+        for i in range(len(embeddings))
+    ]
+    packed = pack_embeddings(embeddings)
+    return {
+        "version": SNAPSHOT_VERSION,
+        "gallery_version": gallery_digest([s["student_id"] for s in students], packed),
+        "session_id": "session",
+        "model_name": "Facenet512",
+        "dimension": EMBEDDING_DIMENSION,
+        "threshold": threshold,
+        "students": students,
+        "embeddings": packed
+    }
+
+
+def test_pack_unpack_round_trip():
+    embeddings = [_embedding(0), _embedding(1)]
+    unpacked = unpack_embeddings(pack_embeddings(embeddings))
+    assert unpacked.shape == (2, EMBEDDING_DIMENSION)
+    np.testing.assert_array_equal(unpacked, np.stack(embeddings))
+
+
+def test_pack_unpack_empty_gallery():
+    unpacked = unpack_embeddings(pack_embeddings([]))
+    assert unpacked.shape == (0, EMBEDDING_DIMENSION)
+
+
+def test_gallery_digest_changes_with_contents():
+    packed = pack_embeddings([_embedding(0)])
+    assert gallery_digest(["a"], packed) == gallery_digest(["a"], packed)
+    assert gallery_digest(["a"], packed) != gallery_digest(["b"], packed)
+
+
+def test_recognizer_rejects_unknown_version():
+    snapshot = _snapshot([_embedding(0)])
+    snapshot["version"] = SNAPSHOT_VERSION + 1
+    with pytest.raises(ValueError):
+        KioskRecognizer(snapshot)
+
+
+def test_recognizer_matches_snapshot_student():
+    recognizer = KioskRecognizer(_snapshot([_embedding(0), _embedding(1)]))
+    matches = recognizer.match(_embedding(1))
+    assert [match["student_id"] for match in matches] == ["s1"]
+    assert matches[0]["confidence"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_recognizer_on_empty_snapshot():
+    recognizer = KioskRecognizer(_snapshot([]))
+    assert recognizer.match(_embedding(0)) == []
+
+
+def test_attendance_event_id_is_stable():
+    recognizer = KioskRecognizer(_snapshot([_embedding(0)]))
+    first = recognizer.attendance_event("s0", 0.9)
+    second = recognizer.attendance_event("s0", 0.8)
+    assert first["event_id"] == second["event_id"] == "session:s0"
+
+
+def test_gallery_index_orders_by_distance_and_applies_threshold():
+    query = _embedding(0)
+    near = query + 0.1 * _embedding(1)
+    nearer = query + 0.05 * _embedding(2)
+    far = _embedding(3)
+    students = [{"student_id": sid, "name": sid, "cne": sid} for sid in ("near", "nearer", "far")]
+    index = GalleryIndex(students, np.stack([near, nearer, far]), threshold=0.55)
+
+    matches = index.match(query)
+
+    assert [match["student_id"] for match in matches] == ["nearer", "near"]
+    assert matches[0]["confidence"] > matches[1]["confidence"]
+
+
+def test_gallery_index_threshold_is_exclusive():
+    students = [{"student_id": "s0", "name": "s0", "cne": "s0"}]
+    index = GalleryIndex(students, np.stack([_embedding(0)]), threshold=0.0)
+    assert index.match(_embedding(0)) == []
+
+
+def test_gallery_index_zero_norm_query():
+    students = [{"student_id": "s0", "name": "s0", "cne": "s0"}]
+    index = GalleryIndex(students, np.stack([_embedding(0)]), threshold=0.55)
+    assert index.match(np.zeros(EMBEDDING_DIMENSION)) == []
+
+
+def test_gallery_index_rejects_mismatched_students():
+    with pytest.raises(ValueError):
+        GalleryIndex([], np.stack([_embedding(0)]), threshold=0.55)
+
+
+def test_build_batch_ids_differ_per_kiosk_and_run():
+    recognizer = KioskRecognizer(_snapshot([_embedding(0)]))
+    events = [recognizer.attendance_event("s0", 0.9)]
+
+    first = build_batch("kiosk-a", events)
+    again = build_batch("kiosk-a", events)
+    other = build_batch("kiosk-b", events)
+
+    assert first["kiosk_id"] == "kiosk-a"
+    assert len({first["batch_id"], again["batch_id"], other["batch_id"]}) == 3
@@ -0,0 +1,113 @@
+import asyncio
+from io import BytesIO
+
+import numpy as np
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from PIL import Image
+
+from app import main
+from app.kiosk import EMBEDDING_DIMENSION
+
+from .fakes import FakeCollection
+
+
+class StubBackend:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+    def represent(self, img_array, **kwargs):
+        return [{"embedding": self.embedding}]
+
+
+class FakeUpload:
+    async def read(self):
+        buffer = BytesIO()
+        Image.new("RGB", (8, 8)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def _student(seed):
+    embedding = np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSION).tolist()
+    return {
+        "_id": ObjectId(),
+        "name": f"Student {seed}",
+        "cne": f"C{seed}",
+        "image": f"image-{seed}",
+        "embedding": embedding
+    }
+
+
+@pytest.fixture
+def classroom(monkeypatch):
+    admin = {"_id": ObjectId()}
+    member, outsider = _student(0), _student(1)
+    session = {
+        "_id": ObjectId(),
+        "admin_id": str(admin["_id"]),
+        "status": "active",
+        "group_id": str(ObjectId()),
+        "roster": [str(member["_id"])]
+    }
+    monkeypatch.setattr(main, "students_collection", FakeCollection([member, outsider]))
+    monkeypatch.setattr(main, "sessions_collection", FakeCollection([session]))
+    monkeypatch.setattr(main, "roster_indexes", {})
+    return admin, session, member, outsider
+
+
+def _recognize(monkeypatch, admin, embedding, session_id=None, fallback_global=False):
+    monkeypatch.setattr(main, "get_embedding_backend", lambda: StubBackend(embedding))
+    return asyncio.run(main.recognize_face(
+        FakeUpload(), session_id=session_id, fallback_global=fallback_global, current_admin=admin
+    ))
+
+
+def test_recognize_searches_roster_only(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    matches = _recognize(monkeypatch, admin, outsider["embedding"], str(session["_id"]))
+
+    assert matches == []
+
+
+def test_recognize_returns_roster_match_with_image(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    matches = _recognize(monkeypatch, admin, member["embedding"], str(session["_id"]), fallback_global=True)
+
+    assert [match["student_id"] for match in matches] == [str(member["_id"])]
+    assert matches[0]["image"] == member["image"]
+
+
+def test_recognize_falls_back_to_global_when_requested(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    matches = _recognize(monkeypatch, admin, outsider["embedding"], str(session["_id"]), fallback_global=True)
+
+    assert [match["student_id"] for match in matches] == [str(outsider["_id"])]
+    assert matches[0]["image"] == outsider["image"]
+
+
+def test_recognize_without_session_searches_global(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    matches = _recognize(monkeypatch, admin, outsider["embedding"])
+
+    assert [match["student_id"] for match in matches] == [str(outsider["_id"])]
+
+
+def test_recognize_rejects_invalid_session_id(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    with pytest.raises(HTTPException) as error:
+        _recognize(monkeypatch, admin, member["embedding"], "not-an-id")
+    assert error.value.status_code == 400
+
+
+def test_recognize_hides_other_admins_session(monkeypatch, classroom):
+    admin, session, member, outsider = classroom
+
+    with pytest.raises(HTTPException) as error:
+        _recognize(monkeypatch, {"_id": ObjectId()}, member["embedding"], str(session["_id"]))
+    assert error.value.status_code == 404
@@ -0,0 +1,65 @@
+import numpy as np
+from bson import ObjectId
+
+from app import main
+from app.kiosk import EMBEDDING_DIMENSION
+
+from .fakes import FakeCollection
+
+
+def _student(seed):
+    embedding = np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSION).tolist()
+    return {"_id": ObjectId(), "name": f"Student {seed}", "cne": f"C{seed}", "embedding": embedding}
+
+
+def _group_session(roster, status="active"):
+    return {"_id": ObjectId(), "group_id": str(ObjectId()), "roster": roster, "status": status}
+
+
+def test_present_count_ignores_off_roster_students():
+    session = _group_session(["a", "b", "c"])
+    session["present_students"] = ["a", "b", "outsider"]
+    assert main._present_count(session) == 2
+    assert main._roster_size(session, total_students=100) == 3
+
+
+def test_sessions_without_group_use_all_students():
+    session = {"_id": ObjectId(), "present_students": ["a", "b"]}
+    assert main._present_count(session) == 2
+    assert main._roster_size(session, total_students=100) == 100
+
+
+def test_roster_index_only_contains_roster(monkeypatch):
+    students = [_student(seed) for seed in range(3)]
+    monkeypatch.setattr(main, "students_collection", FakeCollection(students))
+    monkeypatch.setattr(main, "roster_indexes", {})
+    session = _group_session([str(students[0]["_id"]), str(students[2]["_id"])])
+
+    index = main.get_roster_index(session)
+
+    assert len(index) == 2
+    matches = index.match(students[1]["embedding"])
+    assert str(students[1]["_id"]) not in [match["student_id"] for match in matches]
+
+
+def test_roster_index_cached_only_for_active_sessions(monkeypatch):
+    students = [_student(0)]
+    roster = [str(students[0]["_id"])]
+    monkeypatch.setattr(main, "students_collection", FakeCollection(students))
+    monkeypatch.setattr(main, "roster_indexes", {})
+
+    active = _group_session(roster)
+    completed = _group_session(roster, status="completed")
+
+    assert main.get_roster_index(active) is main.get_roster_index(active)
+    assert main.get_roster_index(completed) is not None
+    assert list(main.roster_indexes) == [str(active["_id"])]
+
+    # Another worker ended the session; this worker must drop its stale entry
+    active["status"] = "completed"
+    assert main.get_roster_index(active) is not None
+    assert main.roster_indexes == {}
+
+
+def test_sessions_without_group_have_no_roster_index():
+    assert main.get_roster_index({"_id": ObjectId(), "status": "active"}) is None